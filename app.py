@@ -1,97 +1,364 @@
 import sys
 import os
-import datetime
+import gc
+import re
+import json
+import time
+import itertools
+import struct
 import threading
+import contextlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 import subprocess # Added for playing audio
 import math # For duration formatting
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QCheckBox, QTextEdit,
     QFileDialog, QMessageBox, QProgressDialog, QSlider, QGroupBox,
-    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QStyledItemDelegate, QStyleOptionButton, QStyle
 )
-from PySide6.QtCore import Qt, Signal, QObject
+from PySide6.QtCore import Qt, Signal, Slot, QObject, QThread, QUrl, QTimer
+from tts_model import compile_model, generate, keep_vocoder_fp32, pick_autocast_dtype
+
+# In-app playback; QtMultimedia can be missing or fail to load its audio backend libraries
+try:
+    from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+    QT_MULTIMEDIA_AVAILABLE = True
+except ImportError as e:
+    print(f"Qt Multimedia unavailable ({e}). Audio will be opened in the system player.")
+    QT_MULTIMEDIA_AVAILABLE = False
+
+# Let the CUDA caching allocator grow segments in place instead of fragmenting on
+# variable-length utterances; must be set before torch initializes CUDA. Windows builds
+# don't support expandable segments and warn about the setting on every start.
+if sys.platform != "win32":
+    os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
+
+# Opt-in for CPU synthesis: one BLAS/OpenMP thread avoids oversubscription on the small
+# per-step matmuls. The thread pools read these variables when torch is imported.
+TTS_SINGLE_THREAD = os.environ.get("TTS_SINGLE_THREAD") == "1"
+if TTS_SINGLE_THREAD:
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    os.environ.setdefault("MKL_NUM_THREADS", "1")
 
 # Attempt to import TTS components
 try:
     import torch # Added import for torch
     import torchaudio as ta
+    import numpy as np
+    import soundfile as sf
     from chatterbox.tts import ChatterboxTTS
+    if TTS_SINGLE_THREAD:
+        torch.set_num_threads(1)
+        torch.set_num_interop_threads(1)
     TTS_AVAILABLE = True
+    TTS_IMPORT_ERROR = None
 except ImportError as e:
     print(f"Error importing TTS libraries: {e}. TTS functionality will be disabled.")
     TTS_AVAILABLE = False
-    # Define dummy classes/functions if TTS is not available to prevent runtime errors
-    class torch: # Added dummy torch class
-        @staticmethod
-        def cuda():
-            return CudaDummy()
-
-    class CudaDummy: # Added dummy CudaDummy class
-        @staticmethod
-        def is_available():
-            return False
-
-    class ChatterboxTTS:
-        @staticmethod
-        def from_pretrained(device):
-            print("TTS Model (dummy) initialized.")
-            return None
-    
-    class ta:
-        @staticmethod
-        def save(filepath, tensor, sample_rate):
-            print(f"Dummy save: {filepath}")
-
-        @staticmethod
-        def info(filepath):
-            print(f"Dummy torchaudio.info called for {filepath}")
-            # Return a dummy object that mimics the structure needed for duration calculation
-            class DummyInfo:
-                def __init__(self):
-                    self.num_frames = 0
-                    self.sample_rate = 16000 # Dummy sample rate
-            return DummyInfo()
-        
-        # Removed dummy is_available from ta, as we'll use torch.cuda.is_available
+    TTS_IMPORT_ERROR = str(e) # Shown to the user once the window is up
 
 # --- Constants ---
 OUTPUT_DIR = "output"
 DEFAULT_VOICE_SAMPLE = "your_voice.wav" # Expected in the root directory
+WARMUP_TEXT = "Warming up." # Synthesized once after loading on CUDA
+CLOSE_WAIT_MS = 2000 # How long closing the window waits for a running TTS task before exiting anyway
+MAX_CACHED_VOICES = 8 # Prepared voice prompts kept on the device (least recently used are evicted)
+TORCH_COMPILE = os.environ.get("TORCH_COMPILE") == "1" # Opt-in: compiling makes model startup much slower
+# "reduce-overhead" makes Inductor record and replay CUDA graphs, one per input shape it sees
+TORCH_COMPILE_MODE = os.environ.get("TORCH_COMPILE_MODE", "default")
+AUTOCAST_DTYPE = os.environ.get("TTS_AUTOCAST_DTYPE", "auto").lower() # auto, bf16, fp16 or fp32
+MAX_AUDIO_LIST_SIZE = 20 # Files shown in the generated audio table
+AUDIO_INDEX_PATH = os.path.join(OUTPUT_DIR, ".index.json") # Cached durations of the listed files
+OUTPUT_SEQUENCE = itertools.count(1) # Keeps names unique when several files are saved within one second
+
+# Create the output directory once up front; exist_ok makes a separate existence check unnecessary
+try:
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+except OSError as e:
+    print(f"Error creating output directory '{OUTPUT_DIR}': {e}")
+
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+CLAUSE_BOUNDARY_RE = re.compile(r'(?<=[,;:])\s+')
+MAX_CHUNK_CHARS = 250 # Upper bound for the text passed to a single generate() call
+CROSSFADE_SECONDS = 0.01 # Overlap between consecutive chunks, hides clicks at the joins
+
+def _pack_pieces(pieces, max_chars):
+    # Greedily joins consecutive pieces into chunks of at most max_chars
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _split_sentence(sentence):
+    if len(sentence) <= MAX_CHUNK_CHARS:
+        return [sentence]
+    # Overlong sentences are broken at clause boundaries, then at word boundaries, and words
+    # longer than a whole chunk (URLs, runs without spaces) are cut up as a last resort
+    pieces = []
+    for clause in CLAUSE_BOUNDARY_RE.split(sentence):
+        if len(clause) <= MAX_CHUNK_CHARS:
+            pieces.append(clause)
+            continue
+        for word in clause.split():
+            pieces.extend(word[i:i + MAX_CHUNK_CHARS] for i in range(0, len(word), MAX_CHUNK_CHARS))
+    return _pack_pieces(pieces, MAX_CHUNK_CHARS)
+
+def _split_text(text):
+    # Long inputs are synthesized in sentence-aligned chunks: the decoder's cost and memory grow
+    # with sequence length and a single call is capped at a fixed number of speech tokens.
+    # Each generate() call has a fixed overhead, so short sentences are packed together.
+    pieces = []
+    for sentence in SENTENCE_BOUNDARY_RE.split(text):
+        sentence = sentence.strip()
+        if sentence:
+            pieces.extend(_split_sentence(sentence))
+    return _pack_pieces(pieces, MAX_CHUNK_CHARS)
+
+def _crossfade(tail, samples):
+    # Linearly blends the held-back end of the previous chunk into the start of this one
+    overlap = min(len(tail), len(samples))
+    ramp = np.linspace(0.0, 1.0, overlap, dtype=np.float32)
+    blended = tail[len(tail) - overlap:] * (1.0 - ramp) + samples[:overlap] * ramp
+    return np.concatenate([tail[:len(tail) - overlap], blended, samples[overlap:]])
+
+def _to_float_samples(wav):
+    # float() because autocast may hand back half-precision samples. The tensor is already in
+    # host memory: ChatterboxTTS moves it off the device itself to apply its watermark in NumPy.
+    return wav.squeeze(0).float().numpy()
+
+def _to_pcm16(samples):
+    # Single float -> int16 conversion; libsndfile then writes the samples without re-encoding.
+    # Clipping in place saves a full-length temporary per chunk.
+    scaled = samples * 32767
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype(np.int16)
+
+def pick_device():
+    # ROCm builds of PyTorch report AMD GPUs through the torch.cuda API as well
+    if torch.cuda.is_available():
+        return "cuda"
+    if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
+        return "mps"
+    return "cpu"
+
+def _wav_duration_seconds(path):
+    # Reads the duration straight from the RIFF chunk headers instead of opening a decoder.
+    # Returns None for anything that isn't an uncompressed WAV file.
+    with open(path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12:
+            return None
+        riff, _, wave = struct.unpack("<4sI4s", header)
+        if riff != b"RIFF" or wave != b"WAVE":
+            return None
+        bytes_per_second = None
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+            if chunk_id == b"fmt ":
+                fmt = f.read(chunk_size)
+                if len(fmt) < 14:
+                    return None
+                audio_format, _, sample_rate, _, block_align = struct.unpack_from("<HHIIH", fmt)
+                if audio_format not in (1, 3, 0xFFFE): # PCM, IEEE float, extensible
+                    return None
+                bytes_per_second = sample_rate * block_align
+                f.seek(chunk_size % 2, 1) # Chunks are padded to an even size
+            elif chunk_id == b"data":
+                return chunk_size / bytes_per_second if bytes_per_second else None
+            else:
+                f.seek(chunk_size + chunk_size % 2, 1)
+
+def _format_duration(duration_seconds):
+    minutes = math.floor(duration_seconds / 60)
+    seconds = math.floor(duration_seconds % 60)
+    return f"{minutes:02d}:{seconds:02d}"
+
+def _probe_duration(path):
+    # Cheapest reader first: the WAV header, then libsndfile, and torchaudio last since newer
+    # releases route ta.info through FFmpeg, which is several times slower per file.
+    # Returns None when no reader is available.
+    duration_seconds = _wav_duration_seconds(path)
+    if duration_seconds is not None or not TTS_AVAILABLE:
+        return duration_seconds
+    try:
+        info = sf.info(path)
+        return info.frames / info.samplerate
+    except RuntimeError: # Format libsndfile can't read
+        pass
+    audio_info = ta.info(path)
+    if audio_info.num_frames > 0 and audio_info.sample_rate > 0:
+        return audio_info.num_frames / audio_info.sample_rate
+    return 0.0 # File might be empty or corrupt
+
+# --- TTS Model Cache ---
+class TTSModelCache:
+    # Loads ChatterboxTTS once and shares it between generations, so only the
+    # first request pays for reading the weights and moving them to the device.
+    def __init__(self):
+        self._model = None
+        self.device = None
+        self._builtin_conds = None # Conditionals of the standard voice shipped with the model
+        self._autocast_dtype = None # Mixed-precision dtype for generation, None means FP32
+        self._voice_conds = OrderedDict() # Prepared conditionals per voice-prompt file, in LRU order
+        self._lock = threading.Lock()
+        # Held while a caller selects voice conditionals and generates with them: the model and its
+        # conds are shared, and two generations at once would also double peak VRAM
+        self.gpu_lock = threading.Lock()
+
+    def get(self, progress_callback=None):
+        # Concurrent callers block on the lock and reuse the loaded model instead of reloading it
+        with self._lock:
+            if self._model is None:
+                if progress_callback:
+                    progress_callback("Loading TTS model...")
+                device = pick_device()
+                if device == "cuda":
+                    self._configure_cuda_backends()
+                # Set up in a local and only published once the warm-up succeeded: a model that failed
+                # it (e.g. TORCH_COMPILE=1 without a working Triton) must not be reused by later requests
+                model = ChatterboxTTS.from_pretrained(device=device)
+                self.device = device
+                # Inference only: disable train-mode layers and drop grad tracking on all weights
+                for module in (model.t3, model.s3gen, model.ve):
+                    module.eval()
+                    module.requires_grad_(False)
+                self._autocast_dtype = pick_autocast_dtype(device, AUTOCAST_DTYPE)
+                if self._autocast_dtype is not None:
+                    keep_vocoder_fp32(model, device)
+                if TORCH_COMPILE:
+                    if progress_callback:
+                        progress_callback("Compiling TTS model...")
+                    compile_model(model, TORCH_COMPILE_MODE)
+                if device == "cuda" or TORCH_COMPILE:
+                    # The decode loop grows its KV cache every step, so it can't be captured in a
+                    # CUDA graph from here; a warm-up run still moves cuBLAS/cuDNN setup, allocator
+                    # growth and compilation out of the first real request.
+                    if progress_callback:
+                        progress_callback("Warming up TTS model...")
+                    with torch.inference_mode(), self.autocast():
+                        generate(model, WARMUP_TEXT)
+                    # Don't keep the warm-up's (and compiler's) scratch memory reserved
+                    gc.collect()
+                    self.release_cached_memory()
+                self._builtin_conds = model.conds
+                self._model = model
+                if progress_callback:
+                    progress_callback("TTS model loaded successfully.")
+            return self._model
+
+    def _configure_cuda_backends(self):
+        # Input lengths differ on every call, so cuDNN autotuning would re-benchmark for each new
+        # shape instead of paying off; TF32 runs the remaining FP32 matmuls on tensor cores (Ampere+)
+        torch.backends.cudnn.benchmark = False
+        torch.backends.cudnn.deterministic = False
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
+
+    def autocast(self):
+        if self._autocast_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type=self.device, dtype=self._autocast_dtype)
+
+    def generate(self, text, **kwargs):
+        return generate(self._model, text, **kwargs)
+
+    def release_cached_memory(self):
+        if self.device == "cuda":
+            # Blocks still used by queued kernels can only be returned once the stream is idle
+            torch.cuda.synchronize()
+            torch.cuda.empty_cache()
+        elif self.device == "mps":
+            torch.mps.empty_cache()
+
+    def use_builtin_voice(self):
+        # A custom voice prompt replaces model.conds, so restore the standard voice explicitly
+        self._model.conds = self._builtin_conds
+
+    def use_voice(self, voice_path, exaggeration):
+        # Decoding and embedding a voice prompt happens once per file. The prepared conditionals
+        # already live on the model's device, so reusing them skips both the decode and the copy.
+        # Keyed on mtime and size too, so re-recording a sample under the same name busts the cache
+        stat = os.stat(voice_path)
+        cache_key = (os.path.abspath(voice_path), stat.st_mtime_ns, stat.st_size)
+        conds = self._voice_conds.get(cache_key)
+        if conds is None:
+            self._model.prepare_conditionals(voice_path, exaggeration=exaggeration)
+            conds = self._voice_conds[cache_key] = self._model.conds
+            if len(self._voice_conds) > MAX_CACHED_VOICES:
+                self._voice_conds.popitem(last=False)
+        else:
+            self._voice_conds.move_to_end(cache_key)
+        self._model.conds = conds
 
 # --- TTS Worker ---
 class TTSWorker(QObject):
+    # Lives on a single long-lived QThread; requests arrive as queued signals and run one at a time
     finished = Signal(str, str) # status_message, output_audio_path
     error = Signal(str)
     progress = Signal(str)
+    model_preloaded = Signal()
+    model_preload_failed = Signal(str)
 
-    def __init__(self, text, use_custom_voice, custom_voice_path, exaggeration, temperature, cfg_weight):
+    def __init__(self, model_cache, save_executor):
         super().__init__()
-        self.text = text
-        self.use_custom_voice = use_custom_voice
-        self.custom_voice_path = custom_voice_path
-        self.exaggeration = exaggeration
-        self.temperature = temperature
-        self.cfg_weight = cfg_weight
+        self.model_cache = model_cache
+        self.save_executor = save_executor
         self.model = None
+        self.partial_output_path = None # Set while run() streams an output file
+
+    @Slot()
+    def preload_model(self):
+        try:
+            self.model_cache.get()
+            self.model_preloaded.emit()
+        except Exception as e:
+            self.model_preload_failed.emit(str(e))
+
+    @Slot(str, float)
+    def prepare_voice(self, voice_path, exaggeration):
+        # Queued behind any running generation; the next run with this sample finds it prepared
+        try:
+            self.model_cache.get()
+            # Not under autocast, same as in run()
+            with self.model_cache.gpu_lock, torch.inference_mode():
+                self.model_cache.use_voice(voice_path, exaggeration)
+        except Exception as e:
+            print(f"Error preparing voice sample {voice_path}: {e}")
 
     def load_model(self):
         if not TTS_AVAILABLE:
             self.error.emit("TTS libraries are not available. Please check installation.")
             return False
         try:
-            self.progress.emit("Loading TTS model...")
-            # Prefer CUDA if available, else CPU
-            device = "cuda" if torch.cuda.is_available() else "cpu" # Changed to torch.cuda.is_available()
-            self.model = ChatterboxTTS.from_pretrained(device=device)
-            self.progress.emit("TTS model loaded successfully.")
+            self.model = self.model_cache.get(self.progress.emit)
             return True
         except Exception as e:
             self.error.emit(f"Error loading TTS model: {e}")
             self.model = None
             return False
 
-    def run(self):
+    @Slot(dict)
+    def run(self, params):
+        text = params["text"]
+        use_custom_voice = params["use_custom_voice"]
+        custom_voice_path = params["custom_voice_path"]
+        exaggeration = params["exaggeration"]
+        temperature = params["temperature"]
+        cfg_weight = params["cfg_weight"]
+
         if not self.load_model():
             return
 
@@ -99,73 +366,176 @@ class TTSWorker(QObject):
             self.error.emit("TTS model not loaded.")
             return
 
-        if not self.text or self.text.strip() == "":
+        if not text or text.strip() == "":
             self.error.emit("Please enter some text to synthesize.")
             return
 
+        wav = None
         try:
             self.progress.emit("Generating speech...")
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename_base = f"speech_{timestamp}"
+            filename_base = f"speech_{int(time.time())}_{next(OUTPUT_SEQUENCE):04d}"
             
             audio_prompt_to_use = None
-            if self.use_custom_voice:
-                if self.custom_voice_path and os.path.exists(self.custom_voice_path):
-                    audio_prompt_to_use = self.custom_voice_path
+            if use_custom_voice:
+                if custom_voice_path and os.path.exists(custom_voice_path):
+                    audio_prompt_to_use = custom_voice_path
                     filename_base += "_custom_voice"
-                    self.progress.emit(f"Using custom voice: {os.path.basename(self.custom_voice_path)}")
+                    self.progress.emit(f"Using custom voice: {os.path.basename(custom_voice_path)}")
                 elif os.path.exists(DEFAULT_VOICE_SAMPLE):
                     audio_prompt_to_use = DEFAULT_VOICE_SAMPLE
                     filename_base += "_default_custom_voice"
                     self.progress.emit(f"Custom voice not provided or invalid. Using default: {DEFAULT_VOICE_SAMPLE}")
                 else:
-                    self.error.emit(f"Custom voice selected, but '{os.path.basename(self.custom_voice_path) if self.custom_voice_path else 'no file'}' not found and default '{DEFAULT_VOICE_SAMPLE}' also not found.")
+                    self.error.emit(f"Custom voice selected, but '{os.path.basename(custom_voice_path) if custom_voice_path else 'no file'}' not found and default '{DEFAULT_VOICE_SAMPLE}' also not found.")
                     return
             else:
                 self.progress.emit("Using standard voice.")
 
-            self.progress.emit(f"Synthesizing: '{self.text[:50]}...' with Exaggeration: {self.exaggeration}, Temp: {self.temperature}, CFG: {self.cfg_weight}")
-            wav = self.model.generate(
-                self.text,
-                audio_prompt_path=audio_prompt_to_use,
-                exaggeration=self.exaggeration,
-                temperature=self.temperature,
-                cfg_weight=self.cfg_weight
-            )
-            
+            self.progress.emit(f"Synthesizing: '{text[:50]}...' with Exaggeration: {exaggeration}, Temp: {temperature}, CFG: {cfg_weight}")
             output_filename = f"{filename_base}.wav"
             output_path = os.path.join(OUTPUT_DIR, output_filename)
-            
-            # Ensure output directory exists
-            if not os.path.exists(OUTPUT_DIR):
-                os.makedirs(OUTPUT_DIR)
-                self.progress.emit(f"Created output directory: {OUTPUT_DIR}")
 
-            ta.save(output_path, wav, self.model.sr)
+            # inference_mode also covers the voice-prompt preprocessing. Autocast doesn't: the voice
+            # encoder hands its projection output to NumPy, which has no bfloat16.
+            with self.model_cache.gpu_lock, torch.inference_mode():
+                if audio_prompt_to_use:
+                    self.model_cache.use_voice(audio_prompt_to_use, exaggeration)
+                else:
+                    self.model_cache.use_builtin_voice()
+                # Chunks share the model and its voice conditionals, so they are generated in order.
+                # Each one is written out as soon as it's ready instead of buffering the whole utterance.
+                chunks = _split_text(text)
+                # Streamed under a temporary name and renamed once complete, so a cut-off file
+                # (failed generation, app closed mid-run) never shows up in the audio list
+                self.partial_output_path = output_path + ".part"
+                crossfade_len = int(self.model.sr * CROSSFADE_SECONDS)
+                with sf.SoundFile(self.partial_output_path, "w", samplerate=self.model.sr, channels=1, format="WAV", subtype="PCM_16") as output_file:
+                    pending_writes = []
+                    held_tail = None # End of the previous chunk, written once it's blended into the next
+                    try:
+                        for chunk_idx, chunk in enumerate(chunks, start=1):
+                            if len(chunks) > 1:
+                                self.progress.emit(f"Synthesizing chunk {chunk_idx}/{len(chunks)}...")
+                            with self.model_cache.autocast():
+                                wav = self.model_cache.generate(
+                                    chunk,
+                                    exaggeration=exaggeration,
+                                    temperature=temperature,
+                                    cfg_weight=cfg_weight
+                                )
+                            samples = _to_float_samples(wav)
+                            if held_tail is not None:
+                                samples = _crossfade(held_tail, samples)
+                            if chunk_idx < len(chunks):
+                                held_tail = samples[-crossfade_len:]
+                                samples = samples[:-crossfade_len]
+                            # The writer thread saves this chunk while the next one is generated
+                            pending_writes.append(self.save_executor.submit(output_file.write, _to_pcm16(samples)))
+                    finally:
+                        wait(pending_writes) # The file must not be closed under the writer thread
+                    for pending_write in pending_writes:
+                        pending_write.result() # Re-raise write errors
+                os.replace(self.partial_output_path, output_path)
+                self.partial_output_path = None
+
             self.progress.emit(f"Speech saved to: {output_path}")
             self.finished.emit(f"Speech generated: {output_filename}", output_path)
 
         except Exception as e:
+            if self.partial_output_path and os.path.exists(self.partial_output_path):
+                os.remove(self.partial_output_path) # Don't leave a truncated file behind
+            self.partial_output_path = None
             self.error.emit(f"Error during speech generation: {e}")
+        finally:
+            # Drop intermediate tensors and hand cached VRAM back so long sessions don't OOM
+            wav = None
+            gc.collect()
+            self.model_cache.release_cached_memory()
+
+# --- Audio Table Button Cells ---
+class ButtonDelegate(QStyledItemDelegate):
+    # Paints a cell's text as a push button, so rows need no widgets of their own;
+    # clicks arrive through the table's cellClicked signal
+    def _button_option(self, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(2, 2, -2, -2)
+        button.text = index.data(Qt.DisplayRole)
+        button.state = QStyle.State_Enabled | (option.state & QStyle.State_MouseOver)
+        return button
+
+    def _style(self, option):
+        return option.widget.style() if option.widget else QApplication.style()
+
+    def paint(self, painter, option, index):
+        self._style(option).drawControl(QStyle.CE_PushButton, self._button_option(option, index), painter, option.widget)
+
+    def sizeHint(self, option, index):
+        button = self._button_option(option, index)
+        text_size = option.fontMetrics.size(Qt.TextShowMnemonic, button.text)
+        return self._style(option).sizeFromContents(QStyle.CT_PushButton, button, text_size, option.widget)
 
 # --- Main Application Window ---
 class TTSApp(QWidget):
+    # Queued to the worker's thread
+    preload_requested = Signal()
+    voice_prepare_requested = Signal(str, float)
+    generation_requested = Signal(dict)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Text-to-Speech Application")
         self.setGeometry(100, 100, 600, 400)
         
         self.current_audio_file = None
-        self.tts_thread = None
-        self.worker = None
+        self.pending_generations = 0 # Requested generations not yet finished or failed
         self.generated_audio_files = [] # To store info about generated files
+        self.model_cache = TTSModelCache() # Shared across generations, loaded once
+        # Single writer thread: chunk writes stay in order and overlap with generation
+        self.save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wav-writer")
+        # One player for the whole session, so a Play click doesn't spawn an external process
+        self.player = None
+        if QT_MULTIMEDIA_AVAILABLE:
+            self.player = QMediaPlayer(self)
+            self.audio_output = QAudioOutput(self)
+            self.player.setAudioOutput(self.audio_output)
+            self.player.errorOccurred.connect(self._on_player_error)
+
+        # One persistent thread does all model work, so requests never pay for thread setup
+        self.tts_thread = QThread()
+        self.worker = TTSWorker(self.model_cache, self.save_executor)
+        self.worker.moveToThread(self.tts_thread)
+        self.preload_requested.connect(self.worker.preload_model)
+        self.voice_prepare_requested.connect(self.worker.prepare_voice)
+        self.generation_requested.connect(self.worker.run)
+        self.worker.finished.connect(self._on_tts_finished)
+        self.worker.error.connect(self._on_tts_error)
+        self.worker.progress.connect(self._update_status)
+        self.worker.model_preloaded.connect(self._on_model_preloaded)
+        self.worker.model_preload_failed.connect(self._on_model_preload_failed)
+        self.tts_thread.start()
 
         self._init_ui()
         self._load_existing_audio_files() # Load existing files on startup
 
         if not TTS_AVAILABLE:
-            self.status_text.setText("TTS libraries not found. Please install them (chatterbox-tts, torchaudio).")
+            self.status_text.setText("TTS libraries not found. Please install them (chatterbox-tts, torchaudio, soundfile).")
+            self.generate_button.setEnabled(False)
+        else:
+            # Warm the model up in the background so the first generation doesn't pay for loading it.
+            # Generation stays disabled until the model is ready.
             self.generate_button.setEnabled(False)
+            self.status_text.append("Loading TTS model in the background...")
+            self.preload_requested.emit()
+
+    def _on_model_preloaded(self):
+        self.status_text.append("TTS model loaded. Ready to generate.")
+        self.generate_button.setEnabled(True)
+
+    def _on_model_preload_failed(self, error_message):
+        print(f"Error preloading TTS model: {error_message}")
+        self.status_text.append(f"Error loading TTS model: {error_message}")
+        # Generating retries the load and reports the error again if it still fails
+        self.generate_button.setEnabled(True)
 
 
     def _init_ui(self):
@@ -197,6 +567,11 @@ class TTSApp(QWidget):
 
         # Generation Parameters
         params_groupbox = QGroupBox("Generation Parameters")
+        # Dragging a slider emits valueChanged for every step; labels are refreshed at most once per frame
+        self.slider_label_timer = QTimer(self)
+        self.slider_label_timer.setSingleShot(True)
+        self.slider_label_timer.setInterval(16)
+        self.slider_label_timer.timeout.connect(self._update_slider_labels)
         params_layout = QVBoxLayout()
 
         # Exaggeration
@@ -208,7 +583,7 @@ class TTSApp(QWidget):
         self.exaggeration_slider.setSingleStep(5)
         self.exaggeration_slider.setTickInterval(25) # Tick for 0.25 steps
         self.exaggeration_slider.setTickPosition(QSlider.TicksBelow)
-        self.exaggeration_slider.valueChanged.connect(lambda value: self.exaggeration_label.setText(f"Exaggeration: {value / 100:.2f} (Neutral = 0.5)"))
+        self.exaggeration_slider.valueChanged.connect(self._schedule_slider_label_update)
         params_layout.addWidget(self.exaggeration_slider)
 
         # Temperature
@@ -220,7 +595,7 @@ class TTSApp(QWidget):
         self.temperature_slider.setSingleStep(5)
         self.temperature_slider.setTickInterval(50) # Tick for 0.5 steps
         self.temperature_slider.setTickPosition(QSlider.TicksBelow)
-        self.temperature_slider.valueChanged.connect(lambda value: self.temperature_label.setText(f"Temperature: {value / 100:.2f}"))
+        self.temperature_slider.valueChanged.connect(self._schedule_slider_label_update)
         params_layout.addWidget(self.temperature_slider)
 
         # CFG Weight
@@ -232,7 +607,7 @@ class TTSApp(QWidget):
         self.cfg_weight_slider.setSingleStep(5)
         self.cfg_weight_slider.setTickInterval(10) # Tick for 0.1 steps
         self.cfg_weight_slider.setTickPosition(QSlider.TicksBelow)
-        self.cfg_weight_slider.valueChanged.connect(lambda value: self.cfg_weight_label.setText(f"CFG Weight/Pace: {value / 100:.2f}"))
+        self.cfg_weight_slider.valueChanged.connect(self._schedule_slider_label_update)
         params_layout.addWidget(self.cfg_weight_slider)
         
         params_groupbox.setLayout(params_layout)
@@ -276,11 +651,26 @@ class TTSApp(QWidget):
         self.audio_table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.audio_table.setEditTriggers(QAbstractItemView.NoEditTriggers) # Make table read-only
         self.audio_table.setFixedHeight(150) # Adjust as needed
+        # One shared delegate draws every Play/Delete cell
+        self.button_delegate = ButtonDelegate(self.audio_table)
+        self.audio_table.setItemDelegateForColumn(2, self.button_delegate)
+        self.audio_table.setItemDelegateForColumn(3, self.button_delegate)
+        self.audio_table.setMouseTracking(True) # Hover highlighting for the painted buttons
+        self.audio_table.cellClicked.connect(self._on_audio_cell_clicked)
         audio_list_layout.addWidget(self.audio_table)
         
         audio_list_groupbox.setLayout(audio_list_layout)
         main_layout.addWidget(audio_list_groupbox)
 
+    def _schedule_slider_label_update(self):
+        if not self.slider_label_timer.isActive():
+            self.slider_label_timer.start()
+
+    def _update_slider_labels(self):
+        self.exaggeration_label.setText(f"Exaggeration: {self.exaggeration_slider.value() / 100:.2f} (Neutral = 0.5)")
+        self.temperature_label.setText(f"Temperature: {self.temperature_slider.value() / 100:.2f}")
+        self.cfg_weight_label.setText(f"CFG Weight/Pace: {self.cfg_weight_slider.value() / 100:.2f}")
+
     def _play_last_audio(self): # This button might become redundant or act on the latest in the list
         if self.generated_audio_files:
             # Play the most recently added file
@@ -297,39 +687,67 @@ class TTSApp(QWidget):
             QMessageBox.information(self, "Playback Info", "No audio has been generated yet, or the file is missing.")
 
     def _play_audio_file(self, file_path):
+        if file_path and os.path.exists(file_path):
+            if self.player is not None:
+                self.player.setSource(QUrl.fromLocalFile(os.path.abspath(file_path))) # Stops any file still playing
+                self.player.play()
+                self.status_text.append(f"Playing: {file_path}")
+            else:
+                self._open_in_system_player(file_path)
+
+    def _on_player_error(self, error, error_string):
+        # e.g. no usable audio backend: hand the file to the system player instead
+        file_path = self.player.source().toLocalFile()
+        self.status_text.append(f"In-app playback failed ({error_string}).")
+        self._open_in_system_player(file_path)
+
+    def _open_in_system_player(self, file_path):
         if file_path and os.path.exists(file_path):
             try:
                 if sys.platform == "win32":
                     os.startfile(file_path)
                 elif sys.platform == "darwin": # macOS
-                    subprocess.call(["open", file_path])
+                    subprocess.Popen(["open", file_path]) # Popen: don't block the UI while the player starts
                 else: # Linux and other Unix-like
-                    subprocess.call(["xdg-open", file_path])
+                    subprocess.Popen(["xdg-open", file_path])
                 self.status_text.append(f"Attempting to play: {file_path}")
             except Exception as e:
                 self.status_text.append(f"Error playing audio: {e}")
                 QMessageBox.warning(self, "Playback Error", f"Could not play audio file: {e}")
 
     def _update_audio_list_table(self):
-        self.audio_table.setRowCount(0) # Clear existing rows
+        # Full reload; single additions and removals update their row in place instead
+        self.audio_table.setRowCount(len(self.generated_audio_files))
         for idx, audio_info in enumerate(self.generated_audio_files):
-            self.audio_table.insertRow(idx)
-            self.audio_table.setItem(idx, 0, QTableWidgetItem(audio_info["name"]))
-            self.audio_table.setItem(idx, 1, QTableWidgetItem(audio_info["duration_str"]))
-            
-            play_button = QPushButton("Play")
-            play_button.clicked.connect(lambda checked=False, path=audio_info["path"]: self._play_audio_file(path))
-            self.audio_table.setCellWidget(idx, 2, play_button)
-
-            delete_button = QPushButton("Delete")
-            delete_button.clicked.connect(lambda checked=False, path=audio_info["path"], row_idx=idx: self._delete_audio_file_from_list(path, row_idx)) # Pass idx for removal from model
-            self.audio_table.setCellWidget(idx, 3, delete_button)
+            self._set_audio_row(idx, audio_info)
         # self.audio_table.resizeColumnsToContents() # Adjust column sizes after populating - Removed to prevent shrinking
 
+    def _set_audio_row(self, row, audio_info):
+        name_item = QTableWidgetItem(audio_info["name"])
+        name_item.setData(Qt.UserRole, audio_info["path"]) # Read back by _on_audio_cell_clicked
+        self.audio_table.setItem(row, 0, name_item)
+        self.audio_table.setItem(row, 1, QTableWidgetItem(audio_info["duration_str"]))
+        self.audio_table.setItem(row, 2, QTableWidgetItem("Play"))
+        self.audio_table.setItem(row, 3, QTableWidgetItem("Delete"))
+
+    def _append_audio_row(self, audio_info):
+        row = self.audio_table.rowCount()
+        self.audio_table.insertRow(row)
+        self._set_audio_row(row, audio_info)
+
+    def _on_audio_cell_clicked(self, row, column):
+        name_item = self.audio_table.item(row, 0)
+        if name_item is None:
+            return
+        file_path = name_item.data(Qt.UserRole)
+        if column == 2:
+            self._play_audio_file(file_path)
+        elif column == 3:
+            self._delete_audio_file_from_list(file_path, row)
 
     def _delete_audio_file_from_list(self, file_path, row_idx_in_model_hint):
         # Find the actual index in self.generated_audio_files based on path,
-        # as row_idx_in_model_hint from the lambda might become stale if items are deleted rapidly
+        # as row_idx_in_model_hint from the clicked row might become stale if items are deleted rapidly
         # or if the list is modified elsewhere. A more robust way is to find by unique ID or path.
         actual_idx_to_delete = -1
         for i, audio_file_info in enumerate(self.generated_audio_files):
@@ -348,8 +766,8 @@ class TTSApp(QWidget):
                         self.status_text.append(f"Deleted file from disk: {file_path}")
                     
                     del self.generated_audio_files[actual_idx_to_delete]
+                    self.audio_table.removeRow(actual_idx_to_delete) # Table rows mirror the list
                     self.status_text.append(f"Removed '{os.path.basename(file_path)}' from list.")
-                    self._update_audio_list_table() # Refresh the table
                     
                 except Exception as e:
                     self.status_text.append(f"Error deleting file {file_path}: {e}")
@@ -368,6 +786,9 @@ class TTSApp(QWidget):
         file_path, _ = QFileDialog.getOpenFileName(self, "Select Custom Voice Sample", "", "WAV Files (*.wav)")
         if file_path:
             self.custom_voice_path_edit.setText(file_path)
+            if TTS_AVAILABLE:
+                # Decode and embed the sample now instead of at the start of the next generation
+                self.voice_prepare_requested.emit(file_path, self.exaggeration_slider.value() / 100.0)
 
     def _start_tts_generation(self):
         text = self.text_input.toPlainText()
@@ -386,31 +807,22 @@ class TTSApp(QWidget):
              QMessageBox.warning(self, "Input Error", f"Custom voice is selected, but no file is provided and '{DEFAULT_VOICE_SAMPLE}' was not found.")
              return
         
-        self.generate_button.setEnabled(False)
-        self.status_text.clear()
-        self.status_text.append("Starting generation...")
-
-        # Create and start worker thread
-        self.worker = TTSWorker(text, use_custom, custom_voice_file if use_custom else None,
-                                exaggeration_val, temperature_val, cfg_weight_val)
-        self.tts_thread = threading.Thread(target=self.worker.run, daemon=True) # Use threading.Thread for simplicity with QObject signals
-        
-        # Connect signals from worker
-        # Note: For proper Qt thread integration, QThread and moveToThread is preferred,
-        # but for this simple case, basic threading with signals can work if worker emits signals correctly.
-        # For robustness, especially with GUI updates from threads, QThread is better.
-        # However, let's try with threading.Thread first for simplicity.
-        # A QProgressDialog might be better for long operations.
-        
-        # For direct GUI updates from a non-GUI thread, it's safer to use signals.
-        # Let's refine this part if direct threading causes issues.
-        # The worker itself is a QObject, so its signals should be thread-safe.
-
-        self.worker.finished.connect(self._on_tts_finished)
-        self.worker.error.connect(self._on_tts_error)
-        self.worker.progress.connect(self._update_status)
-        
-        self.tts_thread.start()
+        # Requests queue up on the worker thread, so Generate stays enabled while one is running
+        self.pending_generations += 1
+        if self.pending_generations == 1:
+            self.status_text.clear()
+            self.status_text.append("Starting generation...")
+        else:
+            self.status_text.append(f"Generation queued ({self.pending_generations - 1} ahead of it).")
+
+        self.generation_requested.emit({
+            "text": text,
+            "use_custom_voice": use_custom,
+            "custom_voice_path": custom_voice_file if use_custom else None,
+            "exaggeration": exaggeration_val,
+            "temperature": temperature_val,
+            "cfg_weight": cfg_weight_val,
+        })
 
     def _update_status(self, message):
         self.status_text.append(message)
@@ -421,87 +833,76 @@ class TTSApp(QWidget):
         self.current_audio_file = output_audio_path # Keep for "Play Last Generated" if still desired
         
         duration_str = "N/A"
-        if TTS_AVAILABLE and hasattr(ta, 'info'): # Check if torchaudio.info is available
-            try:
-                audio_info = ta.info(output_audio_path)
-                if audio_info.num_frames > 0 and audio_info.sample_rate > 0:
-                    duration_seconds = audio_info.num_frames / audio_info.sample_rate
-                    minutes = math.floor(duration_seconds / 60)
-                    seconds = math.floor(duration_seconds % 60)
-                    duration_str = f"{minutes:02d}:{seconds:02d}"
-                else:
-                    duration_str = "00:00" # Or some other indicator of empty/invalid audio
-            except Exception as e:
-                self.status_text.append(f"Could not get audio duration for {output_audio_path}: {e}")
-                print(f"Error getting duration for {output_audio_path}: {e}")
+        try:
+            duration_seconds = _probe_duration(output_audio_path)
+            if duration_seconds is not None:
+                duration_str = _format_duration(duration_seconds)
+        except Exception as e:
+            self.status_text.append(f"Could not get audio duration for {output_audio_path}: {e}")
+            print(f"Error getting duration for {output_audio_path}: {e}")
 
-        self.generated_audio_files.append({
+        audio_info = {
             "path": output_audio_path,
             "name": os.path.basename(output_audio_path),
             "duration_str": duration_str
-        })
-        # Keep the list to a reasonable size, e.g., last 10-20 items
-        MAX_AUDIO_LIST_SIZE = 20
-        if len(self.generated_audio_files) > MAX_AUDIO_LIST_SIZE:
+        }
+        self.generated_audio_files.append(audio_info)
+        self._append_audio_row(audio_info)
+        # Keep the list to a reasonable size
+        while len(self.generated_audio_files) > MAX_AUDIO_LIST_SIZE:
             # Potentially remove oldest files from disk too if they are not referenced elsewhere
             # For now, just remove from the list in UI
-            self.generated_audio_files = self.generated_audio_files[-MAX_AUDIO_LIST_SIZE:]
+            del self.generated_audio_files[0]
+            self.audio_table.removeRow(0)
 
-        self._update_audio_list_table()
-
-        self.generate_button.setEnabled(True)
+        self.pending_generations -= 1
         self.play_button.setEnabled(True) # Enable "Play Last Generated" button
         QMessageBox.information(self, "TTS Complete", f"{status_message}\nSaved to: {output_audio_path}")
 
     def _load_existing_audio_files(self):
-        if not os.path.exists(OUTPUT_DIR):
-            # Create output directory if it doesn't exist, similar to __main__
-            try:
-                os.makedirs(OUTPUT_DIR)
-                self.status_text.append(f"Output directory '{OUTPUT_DIR}' created during startup check.")
-                print(f"Output directory '{OUTPUT_DIR}' created during startup check.")
-            except OSError as e:
-                self.status_text.append(f"Error creating output directory '{OUTPUT_DIR}' on startup: {e}")
-                print(f"Error creating output directory '{OUTPUT_DIR}' on startup: {e}")
-                return # Cannot proceed if dir creation fails here
-
-        found_files_with_details = []
         try:
-            for filename in os.listdir(OUTPUT_DIR):
-                if filename.lower().endswith(".wav"):
-                    file_path = os.path.join(OUTPUT_DIR, filename)
-                    try:
-                        mtime = os.path.getmtime(file_path)
-                        duration_str = "N/A"
-                        # Ensure ta and ta.info are valid before calling
-                        if TTS_AVAILABLE and hasattr(ta, 'info') and callable(getattr(ta, 'info', None)):
-                            audio_info = ta.info(file_path)
-                            if audio_info.num_frames > 0 and audio_info.sample_rate > 0:
-                                duration_seconds = audio_info.num_frames / audio_info.sample_rate
-                                minutes = math.floor(duration_seconds / 60)
-                                seconds = math.floor(duration_seconds % 60)
-                                duration_str = f"{minutes:02d}:{seconds:02d}"
-                            else:
-                                duration_str = "00:00" # File might be empty or corrupt
-                        else:
-                             # Fallback if TTS_AVAILABLE is False or ta.info is not proper
-                            duration_str = "N/A (info unavailable)"
-
-                        found_files_with_details.append({
-                            "path": file_path,
-                            "name": filename,
-                            "duration_str": duration_str,
-                            "mtime": mtime
-                        })
-                    except Exception as e:
-                        print(f"Error processing existing file {file_path}: {e}")
-                        # self.status_text.append(f"Couldn't process existing file {filename}: {e}") # Avoid too much noise on status for minor issues
-            
+            # Only the newest files are listed, so pick them by mtime before probing any audio
+            with os.scandir(OUTPUT_DIR) as entries:
+                wav_files = [(entry.path, entry.stat()) for entry in entries
+                             if entry.is_file() and entry.name.lower().endswith(".wav")]
             # Sort files by modification time, newest first
-            found_files_with_details.sort(key=lambda x: x["mtime"], reverse=True)
-            
-            MAX_AUDIO_LIST_SIZE = 20
-            self.generated_audio_files = found_files_with_details[:MAX_AUDIO_LIST_SIZE]
+            wav_files.sort(key=lambda x: x[1].st_mtime, reverse=True)
+            wav_files = wav_files[:MAX_AUDIO_LIST_SIZE]
+
+            # Durations from earlier launches are reused while a file's mtime and size are unchanged
+            audio_index = self._read_audio_index()
+            found_files_with_details = [None] * len(wav_files)
+            to_probe = []
+            for i, (file_path, stat) in enumerate(wav_files):
+                cached = audio_index.get(os.path.basename(file_path))
+                if cached and cached.get("mtime_ns") == stat.st_mtime_ns and cached.get("size") == stat.st_size:
+                    found_files_with_details[i] = {
+                        "path": file_path,
+                        "name": os.path.basename(file_path),
+                        "duration_str": cached["duration_str"],
+                        "mtime": stat.st_mtime
+                    }
+                else:
+                    to_probe.append(i)
+
+            if to_probe:
+                # Probing is file I/O that releases the GIL, so the files are read concurrently
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    probed = executor.map(lambda i: self._describe_audio_file(wav_files[i][0], wav_files[i][1].st_mtime), to_probe)
+                    for i, details in zip(to_probe, probed):
+                        found_files_with_details[i] = details
+            self.generated_audio_files = [details for details in found_files_with_details if details]
+
+            # Rebuilt from the current listing, so entries for deleted files are dropped
+            self._write_audio_index({
+                details["name"]: {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "duration_str": details["duration_str"]
+                }
+                for details, (_, stat) in zip(found_files_with_details, wav_files)
+                if details and not details["duration_str"].startswith("N/A")
+            })
             
             if self.generated_audio_files:
                  self.status_text.append(f"Loaded {len(self.generated_audio_files)} existing audio file(s) from '{OUTPUT_DIR}'.")
@@ -513,34 +914,79 @@ class TTSApp(QWidget):
         except Exception as e:
             print(f"Error loading existing audio files: {e}")
             self.status_text.append(f"Error loading existing audio files: {e}")
+
+    def _read_audio_index(self):
+        try:
+            with open(AUDIO_INDEX_PATH, "r", encoding="utf-8") as f:
+                audio_index = json.load(f)
+            return audio_index if isinstance(audio_index, dict) else {}
+        except (OSError, ValueError):
+            return {} # Missing or unreadable index: every file gets probed
+
+    def _write_audio_index(self, audio_index):
+        try:
+            # Written to a temporary file first so an interrupted write can't leave a truncated index
+            tmp_path = AUDIO_INDEX_PATH + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(audio_index, f)
+            os.replace(tmp_path, AUDIO_INDEX_PATH)
+        except OSError as e:
+            print(f"Error writing audio index '{AUDIO_INDEX_PATH}': {e}")
+
+    def _describe_audio_file(self, file_path, mtime):
+        # Runs on a pool thread: no widget access here
+        try:
+            duration_seconds = _probe_duration(file_path)
+            if duration_seconds is not None:
+                duration_str = _format_duration(duration_seconds)
+            else:
+                # Not a plain WAV file and the audio libraries aren't available
+                duration_str = "N/A (info unavailable)"
+
+            return {
+                "path": file_path,
+                "name": os.path.basename(file_path),
+                "duration_str": duration_str,
+                "mtime": mtime
+            }
+        except Exception as e:
+            print(f"Error processing existing file {file_path}: {e}")
+            return None
+
     def _on_tts_error(self, error_message):
         self.status_text.append(f"Error: {error_message}")
-        self.generate_button.setEnabled(True)
+        self.pending_generations -= 1
         self.play_button.setEnabled(False) # Keep play button disabled on error
         QMessageBox.critical(self, "TTS Error", error_message)
 
     def closeEvent(self, event):
-        # Clean up thread if running
-        if self.tts_thread and self.tts_thread.is_alive():
-            # QThread has quit() and wait(). For threading.Thread, it's harder to stop cleanly.
-            # Since it's a daemon, it should exit when the main app exits.
-            # For a more graceful shutdown, worker would need a stop flag.
-            print("TTS thread is still running. Closing app.")
+        # A running generation or model preload can't be interrupted; the thread only stops once it
+        # returns to its event loop. Waiting for that without a bound would freeze the closed window.
+        self.tts_thread.quit()
+        finished = self.tts_thread.wait(CLOSE_WAIT_MS)
+        self.save_executor.shutdown(wait=True) # Finish chunks already queued for writing
         event.accept()
+        if not finished:
+            print("TTS task still running, exiting without waiting for it.")
+            # Exiting skips closing the output file, so its WAV header would never get the data size
+            partial_output_path = self.worker.partial_output_path
+            if partial_output_path:
+                try:
+                    os.remove(partial_output_path)
+                except OSError:
+                    pass # Still open on Windows; the .part name keeps it out of the audio list anyway
+            sys.stdout.flush()
+            os._exit(0) # A normal exit would block on joining the busy worker thread
 
 
 # --- Main Execution ---
 if __name__ == "__main__":
-    # Create output directory if it doesn't exist, before app starts
-    if not os.path.exists(OUTPUT_DIR):
-        try:
-            os.makedirs(OUTPUT_DIR)
-            print(f"Output directory '{OUTPUT_DIR}' created.")
-        except OSError as e:
-            print(f"Error creating output directory '{OUTPUT_DIR}': {e}")
-            # Proceed, but generation might fail if dir cannot be made by worker
-
     app = QApplication(sys.argv)
     main_window = TTSApp()
     main_window.show()
+    if not TTS_AVAILABLE:
+        # Without the TTS libraries only the list of existing audio files works
+        QMessageBox.critical(main_window, "TTS Unavailable",
+                             f"Could not import the TTS libraries: {TTS_IMPORT_ERROR}\n\n"
+                             "Speech generation is disabled. Please install them (chatterbox-tts, torchaudio, soundfile).")
     sys.exit(app.exec())
\ No newline at end of file
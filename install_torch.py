@@ -1,86 +1,388 @@
+import ctypes
+import ctypes.util
+import functools
+import glob
+import importlib.metadata
+import os
+import re
 import subprocess
 import sys
+import sysconfig
+import urllib.error
+import urllib.parse
+import urllib.request
 import logging
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Tuple
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def get_cuda_toolkit_version_str() -> Optional[str]:
+# First uv release with torch-backend support (UV_TORCH_BACKEND=auto)
+UV_TORCH_BACKEND_MIN_VERSION = (0, 6, 9)
+
+# CUDA variants PyTorch publishes wheels for, newest first
+PYTORCH_CUDA_VARIANTS = ["126", "124", "121", "118"]
+
+# Versions chatterbox-tts pins (see requirements.lock.txt); torchvision is the release built against that torch
+PYTORCH_PACKAGE_VERSIONS = {"torch": "2.6.0", "torchvision": "0.21.0", "torchaudio": "2.6.0"}
+# Packages the index must serve a wheel of before it is chosen (torchvision isn't needed by the app)
+REQUIRED_INDEX_PACKAGES = ["torch", "torchaudio"]
+
+PYTORCH_INDEX_BASE_URL = "https://download.pytorch.org/whl"
+INDEX_PROBE_TIMEOUT_SECONDS = 15
+
+# Version patterns in the output of 'nvcc --version', 'nvidia-smi' and 'uv --version'
+NVCC_VERSION_RE = re.compile(r"release\s+(\d+)\.(\d+)", re.IGNORECASE)
+NVIDIA_SMI_CUDA_VERSION_RE = re.compile(r"CUDA Version:\s*(\d+)\.(\d+)")
+UV_VERSION_RE = re.compile(r"(\d+)\.(\d+)\.(\d+)")
+# Wheel file names in an index listing, e.g. "torch-2.6.0+cu124-cp311-cp311-linux_x86_64.whl"
+WHEEL_RE = re.compile(r"(\w+)-([^-/\s\"]+)-(cp\d+)-[^-/\s\"]+-([\w.]+)\.whl")
+
+# Toolkit locations checked when nvcc isn't on PATH (Linux, NVIDIA HPC SDK, Windows)
+NVCC_GLOB_PATTERNS = [
+    "/usr/local/cuda*/bin/nvcc",
+    "/opt/nvidia/hpc_sdk/Linux_x86_64/*/cuda/bin/nvcc",
+    r"C:\Program Files\NVIDIA GPU Computing Toolkit\CUDA\v*\bin\nvcc.exe",
+]
+
+def _get_cuda_runtime_version_str() -> Optional[str]:
     """
-    Detects the installed CUDA toolkit version.
+    Reads the CUDA version from the CUDA runtime library (libcudart) without spawning a process.
+    Returns the version string (e.g., "118" for CUDA 11.8) or None if the library can't be loaded.
+    """
+    if sys.platform == "win32":
+        # The toolkit installer sets CUDA_PATH; the DLL is named after the major version, e.g. cudart64_12.dll
+        cuda_path = os.environ.get("CUDA_PATH")
+        candidates = sorted(glob.glob(os.path.join(cuda_path, "bin", "cudart64_*.dll")), reverse=True) if cuda_path else []
+    else:
+        candidates = ["libcudart.so"]
+        library_path = ctypes.util.find_library("cudart")
+        if library_path:
+            candidates.append(library_path)
+
+    for candidate in candidates:
+        version = ctypes.c_int()
+        try:
+            # Returns cudaSuccess (0) and encodes the version as 1000 * major + 10 * minor, e.g. 11080
+            status = ctypes.CDLL(candidate).cudaRuntimeGetVersion(ctypes.byref(version))
+        except (OSError, AttributeError):
+            continue
+        if status == 0 and version.value > 0:
+            major, minor = version.value // 1000, (version.value % 1000) // 10
+            return f"{major}{minor}"
+    logger.debug("CUDA runtime library not found or not usable.")
+    return None
+
+def _get_nvcc_version_str(nvcc: str = "nvcc") -> Optional[str]:
+    """
+    Detects the CUDA toolkit version by running '<nvcc> --version'.
     Returns the version string (e.g., "118" for CUDA 11.8) or None if not found.
     """
     try:
         # Attempt to get CUDA version using nvcc
         process_output = subprocess.check_output(
-            ["nvcc", "--version"],
+            [nvcc, "--version"],
             text=True,
             stderr=subprocess.PIPE  # Capture stderr to check for errors silently
         )
-        for line in process_output.splitlines():
-            if "release" in line.lower(): # Make search case-insensitive
-                # Example line: "Cuda compilation tools, release 11.8, V11.8.89"
-                version_part = line.lower().split("release")[-1].strip()
-                version_number_str = version_part.split(",")[0].strip() # "11.8"
-                # Remove dot and return, e.g., "118"
-                return version_number_str.replace(".", "")
+        # Example line: "Cuda compilation tools, release 11.8, V11.8.89" -> "118"
+        match = NVCC_VERSION_RE.search(process_output)
+        if match:
+            return f"{match.group(1)}{match.group(2)}"
     except FileNotFoundError:
         logger.debug("nvcc command not found. CUDA toolkit might not be installed or not in PATH.")
     except subprocess.CalledProcessError as e:
-        logger.debug(f"nvcc --version command failed with error: {e.stderr}")
+        logger.debug("nvcc --version command failed with error: %s", e.stderr)
     except Exception as e:
-        logger.warning(f"An unexpected error occurred while detecting CUDA version: {e}")
+        logger.warning("An unexpected error occurred while detecting CUDA version: %s", e)
+    return None
+
+def _get_default_path_nvcc_version_str() -> Optional[str]:
+    """
+    Looks for nvcc in the default toolkit install locations, for when it isn't on PATH.
+    Returns the version string of the first toolkit found or None.
+    """
+    nvcc_paths = []
+    for pattern in NVCC_GLOB_PATTERNS:
+        # Newest version first; glob patterns don't match on other platforms
+        nvcc_paths.extend(sorted(glob.glob(pattern), reverse=True))
+    # /usr/local/cuda is the system's default toolkit, prefer it over the versioned directories
+    nvcc_paths.sort(key=lambda path: not path.startswith("/usr/local/cuda/"))
+    for nvcc_path in nvcc_paths:
+        version = _get_nvcc_version_str(nvcc_path)
+        if version:
+            return version
+    return None
+
+def _get_nvidia_smi_cuda_version_str() -> Optional[str]:
+    """
+    Reads the highest CUDA version the installed driver supports from the 'nvidia-smi' header.
+    Returns the version string (e.g., "124" for CUDA 12.4) or None if not found.
+    """
+    try:
+        process_output = subprocess.check_output(["nvidia-smi"], text=True, stderr=subprocess.PIPE)
+    except (OSError, subprocess.CalledProcessError) as e:
+        # OSError also covers a binary that exists but can't be run (e.g. permission denied)
+        logger.debug("nvidia-smi not found or failed (%s). No NVIDIA driver detected.", e)
+        return None
+    # Example header: "| NVIDIA-SMI 550.54.14    Driver Version: 550.54.14    CUDA Version: 12.4 |"
+    match = NVIDIA_SMI_CUDA_VERSION_RE.search(process_output)
+    return f"{match.group(1)}{match.group(2)}" if match else None
+
+@functools.lru_cache(maxsize=1)
+def get_cuda_toolkit_version_str() -> Optional[str]:
+    """
+    Detects the installed CUDA toolkit version.
+    Returns the version string (e.g., "118" for CUDA 11.8) or None if not found.
+    The result is cached, so repeated calls don't probe again.
+    """
+    # In order of preference: the runtime library, nvcc on PATH, nvcc in the default install
+    # locations, and the driver's CUDA version as a last resort when no toolkit is installed
+    probes = [
+        _get_cuda_runtime_version_str,
+        _get_nvcc_version_str,
+        _get_default_path_nvcc_version_str,
+        _get_nvidia_smi_cuda_version_str,
+    ]
+    # All probes start at once, so the slow ones (process start-up) overlap. Results are still
+    # taken in order of preference, and the remaining probes are dropped once one succeeds.
+    executor = ThreadPoolExecutor(max_workers=len(probes))
+    try:
+        futures = [executor.submit(probe) for probe in probes]
+        for probe, future in zip(probes, futures):
+            # A probe that fails unexpectedly must not hide the results of the others
+            try:
+                version = future.result()
+            except Exception as e:
+                logger.warning("CUDA version probe %s failed: %s", probe.__name__, e)
+                continue
+            if version:
+                return version
+        return None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _get_nvml_cuda_version_str() -> Optional[str]:
+    """
+    Reads the highest CUDA version the installed driver supports through NVML, without spawning a process.
+    Returns the version string (e.g., "124" for CUDA 12.4) or None if NVML isn't available.
+    """
+    library_name = "nvml.dll" if sys.platform == "win32" else "libnvidia-ml.so.1"
+    try:
+        nvml = ctypes.CDLL(library_name)
+        if nvml.nvmlInit_v2() != 0:
+            return None
+        try:
+            version = ctypes.c_int()
+            # Encoded as 1000 * major + 10 * minor, e.g. 12040
+            if nvml.nvmlSystemGetCudaDriverVersion_v2(ctypes.byref(version)) == 0 and version.value > 0:
+                return f"{version.value // 1000}{(version.value % 1000) // 10}"
+        finally:
+            nvml.nvmlShutdown()
+    except (OSError, AttributeError):
+        logger.debug("NVML not found or not usable. No NVIDIA driver detected.")
+    return None
+
+@functools.lru_cache(maxsize=1)
+def get_cuda_version_str() -> Optional[str]:
+    """
+    Detects the CUDA version to select PyTorch wheels for.
+    Returns the version string (e.g., "124" for CUDA 12.4) or None if not found.
+    """
+    # PyTorch wheels bundle their own CUDA runtime, so what matters is the CUDA version the
+    # driver can run. The toolkit version is only used when the driver can't be queried.
+    return _get_nvml_cuda_version_str() or get_cuda_toolkit_version_str()
+
+def _cuda_version_tuple(cuda_version_str: str) -> tuple:
+    # "118" -> (11, 8); the last digit is the minor version
+    return int(cuda_version_str[:-1]), int(cuda_version_str[-1])
+
+def select_pytorch_cuda_variant(cuda_version_str: str) -> Optional[str]:
+    """
+    Picks the newest CUDA variant PyTorch publishes wheels for that doesn't exceed the given CUDA version.
+    Returns None if the version is older than all of them.
+    """
+    for variant in PYTORCH_CUDA_VARIANTS:
+        if _cuda_version_tuple(variant) <= _cuda_version_tuple(cuda_version_str):
+            return variant
     return None
 
 def determine_pytorch_index_url(cuda_version_str: Optional[str]) -> str:
     """
     Determines the appropriate PyTorch wheel index URL based on the CUDA version.
-    Falls back to CPU if CUDA version is not provided.
+    Falls back to CPU if CUDA version is not provided or older than any CUDA build.
     """
     if cuda_version_str:
-        # Construct URL for CUDA-enabled PyTorch
-        # e.g., https://download.pytorch.org/whl/cu118
-        return f"https://download.pytorch.org/whl/cu{cuda_version_str}"
+        variant = select_pytorch_cuda_variant(cuda_version_str)
+        if variant:
+            # Construct URL for CUDA-enabled PyTorch
+            # e.g., https://download.pytorch.org/whl/cu118
+            return f"{PYTORCH_INDEX_BASE_URL}/cu{variant}"
+        logger.info("CUDA %s is older than any PyTorch CUDA build, defaulting to CPU PyTorch index.", cuda_version_str)
     else:
-        # Fallback to CPU-only PyTorch
         logger.info("CUDA not detected or version unknown, defaulting to CPU PyTorch index.")
-        return "https://download.pytorch.org/whl/cpu"
+    # Fallback to CPU-only PyTorch
+    return f"{PYTORCH_INDEX_BASE_URL}/cpu"
+
+def _platform_os_and_arch() -> Tuple[str, str]:
+    # sysconfig platforms look like "linux-x86_64", "win-amd64" or "macosx-11.0-arm64"
+    parts = sysconfig.get_platform().split("-")
+    return parts[0], parts[-1]
+
+def _index_lists_wheel(pytorch_index_url: str, package: str) -> Optional[bool]:
+    # Whether the index has the pinned version of the package for this Python version and platform,
+    # None if it couldn't be queried
+    try:
+        with urllib.request.urlopen(f"{pytorch_index_url}/{package}/", timeout=INDEX_PROBE_TIMEOUT_SECONDS) as response:
+            listing = urllib.parse.unquote(response.read().decode("utf-8", errors="replace"))
+    except urllib.error.HTTPError as e:
+        if e.code == 404: # No such index (e.g. a CUDA version PyTorch doesn't build for)
+            return False
+        logger.debug("Querying %s failed: %s", pytorch_index_url, e)
+        return None
+    except (urllib.error.URLError, OSError) as e:
+        logger.debug("Querying %s failed: %s", pytorch_index_url, e)
+        return None
+
+    python_tag = f"cp{sys.version_info.major}{sys.version_info.minor}"
+    platform_os, platform_arch = _platform_os_and_arch()
+    for wheel_package, wheel_version, wheel_python_tag, wheel_platform_tags in WHEEL_RE.findall(listing):
+        # The version carries the build as a local tag, e.g. "2.6.0+cu124"
+        if (wheel_package != package or wheel_python_tag != python_tag
+                or wheel_version.partition("+")[0] != PYTORCH_PACKAGE_VERSIONS[package]):
+            continue
+        # Compressed tag sets are dot-separated, e.g. "manylinux1_x86_64.manylinux2014_x86_64"
+        for platform_tag in wheel_platform_tags.split("."):
+            if platform_os in platform_tag and platform_tag.endswith(f"_{platform_arch.replace('.', '_')}"):
+                return True
+    return False
+
+def index_has_matching_wheel(pytorch_index_url: str) -> Optional[bool]:
+    """
+    Checks whether the index lists the pinned torch and torchaudio versions for the running Python version and platform.
+    Returns None if the index couldn't be queried (e.g. no network), so the caller can keep its choice.
+    """
+    for package in REQUIRED_INDEX_PACKAGES:
+        available = _index_lists_wheel(pytorch_index_url, package)
+        if not available:
+            return available
+    return True
+
+def validate_pytorch_index_url(pytorch_index_url: str) -> str:
+    """
+    Makes sure the chosen CUDA index serves the pinned torch and torchaudio for this Python version and platform.
+    Otherwise walks down to older CUDA variants and finally to the CPU index.
+    """
+    cpu_index_url = f"{PYTORCH_INDEX_BASE_URL}/cpu"
+    variant = pytorch_index_url.rstrip("/").rsplit("/", 1)[-1]
+    if not variant.startswith("cu"):
+        return pytorch_index_url
 
-def execute_pytorch_installation(pytorch_index_url: str, packages: List[str] = None) -> None:
+    # The chosen index first, then every older variant the driver can also run
+    candidate_urls = [pytorch_index_url] + [
+        f"{PYTORCH_INDEX_BASE_URL}/cu{older_variant}" for older_variant in PYTORCH_CUDA_VARIANTS
+        if _cuda_version_tuple(older_variant) < _cuda_version_tuple(variant[2:])
+    ]
+    for candidate_url in candidate_urls:
+        available = index_has_matching_wheel(candidate_url)
+        if available is None:
+            logger.warning("Could not check %s for a matching wheel, using it as is.", candidate_url)
+            return candidate_url
+        if available:
+            return candidate_url
+        logger.info("%s has no torch %s wheels for Python %d.%d on %s, trying an older CUDA build.",
+                    candidate_url, PYTORCH_PACKAGE_VERSIONS["torch"], sys.version_info.major, sys.version_info.minor,
+                    sysconfig.get_platform())
+    logger.info("No CUDA build of torch %s matches this Python version and platform, defaulting to CPU PyTorch index.",
+                PYTORCH_PACKAGE_VERSIONS["torch"])
+    return cpu_index_url
+
+def uv_supports_torch_backend() -> bool:
     """
-    Installs PyTorch, torchvision, and torchaudio using 'uv pip install'.
+    Checks whether the installed uv can select the PyTorch index itself (torch-backend, uv 0.6.9+).
+    """
+    try:
+        process_output = subprocess.check_output(["uv", "--version"], text=True, stderr=subprocess.PIPE)
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        return False
+    # Example output: "uv 0.6.9 (3d9460278 2025-03-20)"
+    match = UV_VERSION_RE.search(process_output)
+    return bool(match) and tuple(int(part) for part in match.groups()) >= UV_TORCH_BACKEND_MIN_VERSION
+
+def is_installed_for_index(pytorch_index_url: str, packages: List[str]) -> bool:
+    """
+    Checks whether all packages are already installed as builds from the given index,
+    i.e. their local version tag (e.g. "2.6.0+cu118") matches the index (".../whl/cu118").
+    Pinned packages ("torch==2.6.0") must also be installed in that version.
+    """
+    variant = pytorch_index_url.rstrip("/").rsplit("/", 1)[-1] # e.g. "cu118" or "cpu"
+    for package in packages:
+        package_name, _, pinned_version = package.partition("==")
+        try:
+            installed_version = importlib.metadata.version(package_name)
+        except importlib.metadata.PackageNotFoundError:
+            return False
+        public_version, _, local_version = installed_version.partition("+")
+        if local_version != variant or (pinned_version and public_version != pinned_version):
+            return False
+    return True
+
+def execute_pytorch_installation(pytorch_index_url: Optional[str], packages: List[str] = None) -> None:
+    """
+    Installs PyTorch, torchvision, and torchaudio using 'uv pip install', pinned to PYTORCH_PACKAGE_VERSIONS.
+    Without an index URL, uv picks the PyTorch index for the detected GPU driver (UV_TORCH_BACKEND=auto).
     """
     if packages is None:
-        packages = ["torch", "torchvision", "torchaudio"]
+        packages = [f"{name}=={version}" for name, version in PYTORCH_PACKAGE_VERSIONS.items()]
+    package_list = ", ".join(packages)
 
-    logger.info(f"Attempting to install {', '.join(packages)} using index: {pytorch_index_url}")
-    
     installation_command: List[str] = [
         "uv", "pip", "install",
-        *packages,
-        "--index-url", pytorch_index_url
+        *packages
     ]
+    env = dict(os.environ)
 
-    # Add --pre flag if installing from a nightly build URL (heuristic)
-    if "nightly" in pytorch_index_url or "test" in pytorch_index_url:
-        logger.info("Nightly or test URL detected, adding --pre flag for pip.")
-        installation_command.append("--pre")
+    if pytorch_index_url:
+        is_prerelease_index = "nightly" in pytorch_index_url or "test" in pytorch_index_url
+        # Matching builds are already there: skip uv's resolution and index requests entirely.
+        # Nightly and test indexes are always reinstalled so newer builds are picked up.
+        if not is_prerelease_index and is_installed_for_index(pytorch_index_url, packages):
+            logger.info("%s already installed from %s, nothing to do.", package_list, pytorch_index_url)
+            return
+        logger.info("Attempting to install %s using index: %s", package_list, pytorch_index_url)
+        installation_command.extend(["--index-url", pytorch_index_url])
+        # Add --pre flag if installing from a nightly build URL (heuristic)
+        if is_prerelease_index:
+            logger.info("Nightly or test URL detected, adding --pre flag for pip.")
+            installation_command.append("--pre")
+    else:
+        # A backend the user already chose (e.g. UV_TORCH_BACKEND=cu126) is left as is
+        env.setdefault("UV_TORCH_BACKEND", "auto")
+        logger.info("Attempting to install %s with UV_TORCH_BACKEND=%s", package_list, env["UV_TORCH_BACKEND"])
     
     try:
-        logger.info(f"Executing command: {' '.join(installation_command)}")
-        subprocess.run(installation_command, check=True, text=True, capture_output=True)
-        logger.info(f"{', '.join(packages)} installed successfully from {pytorch_index_url}.")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"PyTorch installation failed with return code {e.returncode}.")
-        logger.error(f"Command: {' '.join(e.cmd)}")
-        if e.stdout:
-            logger.error(f"Stdout:\n{e.stdout}")
-        if e.stderr:
-            logger.error(f"Stderr:\n{e.stderr}")
-        logger.error("Please try installing manually or check the 'uv' and network configuration.")
-        sys.exit(1)
+        command_str = " ".join(installation_command)
+        logger.info("Executing command: %s", command_str)
+        # Output is relayed line by line as uv prints it instead of being buffered until it exits
+        with subprocess.Popen(
+            installation_command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env=env
+        ) as process:
+            for line in process.stdout:
+                logger.info("%s", line.rstrip())
+            return_code = process.wait()
+        if return_code != 0:
+            logger.error("PyTorch installation failed with return code %d.", return_code)
+            logger.error("Command: %s", command_str)
+            logger.error("Please try installing manually or check the 'uv' and network configuration.")
+            sys.exit(1)
+        logger.info("%s installed successfully from %s.", package_list, pytorch_index_url or "the index selected by uv")
     except FileNotFoundError:
         logger.error("'uv' command not found. Please ensure 'uv' is installed and in your PATH.")
         logger.error("You can install 'uv' from https://github.com/astral-sh/uv")
@@ -91,15 +393,22 @@ def main() -> None:
     Main script execution function.
     """
     logger.info("Starting PyTorch installation script.")
+
+    if uv_supports_torch_backend():
+        # uv queries the GPU driver itself and picks the matching index, no detection needed here
+        logger.info("uv supports automatic PyTorch backend selection, letting it choose the index.")
+        execute_pytorch_installation(None)
+        logger.info("PyTorch installation process finished.")
+        return
     
-    cuda_version = get_cuda_toolkit_version_str()
+    cuda_version = get_cuda_version_str()
     if cuda_version:
-        logger.info(f"Detected CUDA toolkit version: {cuda_version} (formatted as cu{cuda_version})")
+        logger.info("Detected CUDA version: %s (formatted as cu%s)", cuda_version, cuda_version)
     else:
-        logger.info("No CUDA toolkit detected or version could not be determined.")
+        logger.info("No CUDA driver or toolkit detected or version could not be determined.")
         
-    pytorch_url = determine_pytorch_index_url(cuda_version)
-    logger.info(f"Selected PyTorch index URL: {pytorch_url}")
+    pytorch_url = validate_pytorch_index_url(determine_pytorch_index_url(cuda_version))
+    logger.info("Selected PyTorch index URL: %s", pytorch_url)
     
     execute_pytorch_installation(pytorch_url)
     
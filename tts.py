@@ -1,13 +1,108 @@
-import torchaudio as ta
-from chatterbox.tts import ChatterboxTTS
+import argparse
+import contextlib
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-model = ChatterboxTTS.from_pretrained(device="cuda")
+from tts_model import compile_model, generate, keep_vocoder_fp32, pick_autocast_dtype
 
-text = "Hello! This is my voice sample. I speak clearly, smoothly, expressively, and with variety. Let this text help create a unique voiceover just for me."
-wav = model.generate(text)
-ta.save("test-1.wav", wav, model.sr)
+DEFAULT_TEXT = "Hello! This is my voice sample. I speak clearly, smoothly, expressively, and with variety. Let this text help create a unique voiceover just for me."
+AUDIO_PROMPT_PATH = "your_voice.wav"
+VOICE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "local_tts", "spk")
 
-# If you want to synthesize with a different voice, specify the audio prompt
-AUDIO_PROMPT_PATH="your_voice.wav"
-wav = model.generate(text, audio_prompt_path=AUDIO_PROMPT_PATH)
-ta.save("test-1-your_voice.wav", wav, model.sr)
\ No newline at end of file
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Synthesize speech with ChatterboxTTS.")
+    parser.add_argument("--text", default=DEFAULT_TEXT, help="Text to synthesize.")
+    parser.add_argument("--audio-prompt", default=AUDIO_PROMPT_PATH,
+                        help="Voice sample for a second synthesis in that voice; pass an empty string to skip it.")
+    parser.add_argument("--output-prefix", default="test-1",
+                        help="Output files are <prefix>.wav and <prefix>-<voice sample name>.wav.")
+    parser.add_argument("--device", default="cuda", help="Torch device to run the model on.")
+    parser.add_argument("--dtype", choices=["auto", "bf16", "fp16", "fp32"], default="auto",
+                        help="Autocast precision; auto uses bf16 on Ampere or newer GPUs, fp16 on older ones "
+                             "and fp32 on other devices.")
+    parser.add_argument("--compile", nargs="?", const="default", default=None, metavar="MODE",
+                        help="Compile the model with torch.compile in MODE (default: default; pass "
+                             "reduce-overhead to replay CUDA graphs). "
+                             "Adds a compilation and warm-up run before synthesis, so it pays off for longer texts.")
+    return parser.parse_args()
+
+
+def use_voice(model, voice_path):
+    # Prepared conditionals (speaker embedding, prompt tokens and reference mels) are stored per
+    # voice sample, so later runs skip decoding, resampling and encoding it. The key includes
+    # mtime and size, so re-recording a sample under the same name prepares it again.
+    from chatterbox.tts import Conditionals
+
+    stat = os.stat(voice_path)
+    cache_key = f"{os.path.abspath(voice_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    cache_path = os.path.join(VOICE_CACHE_DIR, hashlib.blake2b(cache_key.encode(), digest_size=16).hexdigest() + ".pt")
+    if os.path.exists(cache_path):
+        try:
+            model.conds = Conditionals.load(cache_path).to(model.device)
+            return
+        except Exception as e:
+            print(f"Ignoring unreadable voice cache {cache_path}: {e}")
+
+    model.prepare_conditionals(voice_path)
+    try:
+        os.makedirs(VOICE_CACHE_DIR, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        model.conds.save(tmp_path)
+        os.replace(tmp_path, cache_path) # A crash mid-write must not leave a truncated cache entry
+    except OSError as e:
+        print(f"Could not cache voice conditionals in {VOICE_CACHE_DIR}: {e}")
+
+
+def main():
+    args = parse_args()
+
+    # Imported only once arguments are parsed: torch and the model code take seconds to load,
+    # which --help and importing this module shouldn't pay for
+    import torch
+    import soundfile as sf
+    from chatterbox.tts import ChatterboxTTS
+
+    model = ChatterboxTTS.from_pretrained(device=args.device)
+
+    # Autocast instead of casting the weights, and only around generate(): T3 and the flow decoder
+    # run their matmuls in reduced precision. Voice prompts are prepared outside it, since the voice
+    # encoder passes its output to NumPy (no bfloat16).
+    device_type = args.device.split(":")[0] # "cuda:1" -> "cuda"
+    autocast_dtype = pick_autocast_dtype(args.device, args.dtype)
+    if autocast_dtype is not None:
+        keep_vocoder_fp32(model, device_type)
+
+    def autocast():
+        if autocast_dtype is None:
+            return contextlib.nullcontext()
+        return torch.autocast(device_type=device_type, dtype=autocast_dtype)
+
+    if args.compile:
+        compile_model(model, args.compile)
+        # Compilation happens on the first call, keep it out of the real synthesis
+        with autocast():
+            generate(model, "Warming up.")
+
+    # Files are written on a worker thread while the next utterance is generated. generate()
+    # already returns the waveform in host memory, so no device copy is needed first.
+    with ThreadPoolExecutor(max_workers=1) as save_executor:
+        with autocast():
+            wav = generate(model, args.text)
+        saves = [save_executor.submit(sf.write, f"{args.output_prefix}.wav", wav.squeeze(0).numpy(), model.sr, subtype="PCM_16")]
+
+        # If you want to synthesize with a different voice, specify the audio prompt
+        if args.audio_prompt:
+            use_voice(model, args.audio_prompt)
+            with autocast():
+                wav = generate(model, args.text)
+            voice_name = os.path.splitext(os.path.basename(args.audio_prompt))[0]
+            saves.append(save_executor.submit(sf.write, f"{args.output_prefix}-{voice_name}.wav", wav.squeeze(0).numpy(), model.sr, subtype="PCM_16"))
+
+    for save in saves:
+        save.result() # Re-raise write errors
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Tweaks to a loaded ChatterboxTTS model, shared by the GUI (app.py) and the CLI (tts.py).
+
+Kept free of Qt, and torch is only imported inside the functions, so importing this module is cheap.
+"""
+
+ALIGNMENT_LAYER_IDX = 9 # T3 attention layer ChatterboxTTS hooks on every generate() call
+
+
+def compile_model(model, mode="default"):
+    """Compile the T3 decoder layers and the S3Gen flow estimator in place with torch.compile."""
+    import torch
+
+    # Decoder layers are compiled in place, since ChatterboxTTS calls T3 and S3Gen through
+    # .inference() rather than forward. The alignment layer is skipped: generate() re-hooks it on
+    # every call, which would force a recompile each time. Shapes change every decode step, hence dynamic=True.
+    for layer_idx, layer in enumerate(model.t3.tfmr.layers):
+        if layer_idx != ALIGNMENT_LAYER_IDX:
+            layer.compile(mode=mode, dynamic=True)
+    # The flow-matching estimator runs once per solver step for every utterance. The flow decoder
+    # calls estimator.forward() directly, bypassing __call__, so Module.compile() would be a
+    # no-op here; the bound forward itself is replaced by its compiled version.
+    estimator = model.s3gen.flow.decoder.estimator
+    estimator.forward = torch.compile(estimator.forward, mode=mode, dynamic=True)
+
+
+def pick_autocast_dtype(device, dtype="auto"):
+    """Pick the autocast dtype for dtype "auto", "bf16", "fp16" or "fp32" on the device; None means FP32."""
+    import torch
+
+    if dtype == "fp32":
+        return None
+    if dtype == "bf16":
+        return torch.bfloat16
+    if dtype == "fp16":
+        return torch.float16
+    if device.startswith("cuda"):
+        # bfloat16 needs Ampere (sm_80) or newer, older GPUs fall back to float16
+        major, _ = torch.cuda.get_device_capability(device)
+        return torch.bfloat16 if major >= 8 else torch.float16
+    # Reduced precision on CPU/MPS is only faster on some hardware, so it's opt-in there
+    return None
+
+
+def keep_vocoder_fp32(model, device_type="cuda"):
+    """Run the HiFT vocoder in FP32 even when generation runs under autocast."""
+    import torch
+
+    # The vocoder runs an STFT/iSTFT on its own activations. FFTs don't accept bfloat16
+    # and reduced precision there is audible.
+    mel2wav = model.s3gen.mel2wav
+    inference = mel2wav.inference
+
+    def fp32_inference(speech_feat, **kwargs):
+        with torch.autocast(device_type=device_type, enabled=False):
+            return inference(speech_feat=speech_feat.float(), **kwargs)
+
+    mel2wav.inference = fp32_inference
+
+
+def remove_alignment_spy(model):
+    """Undo the attention hook ChatterboxTTS.generate() installs and never removes."""
+    # With a long-lived model the hooks pile up, each copying attention maps to the CPU per step
+    try:
+        attention = model.t3.tfmr.layers[ALIGNMENT_LAYER_IDX].self_attn
+    except (AttributeError, IndexError):
+        return
+    attention._forward_hooks.clear()
+    attention.__dict__.pop("forward", None) # Patched instance method shadowing the class forward
+
+
+def generate(model, text, **kwargs):
+    """Call model.generate() and remove the attention hook it leaves behind."""
+    try:
+        return model.generate(text, **kwargs)
+    finally:
+        remove_alignment_spy(model)